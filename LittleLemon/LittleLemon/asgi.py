@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LittleLemon.settings')
 
 application = get_asgi_application()
+
+from LittleLemonAPI.catalog import preload  # noqa: E402
+
+preload()
@@ -49,6 +49,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "LittleLemonAPI.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -147,3 +148,7 @@ REST_FRAMEWORK = {
 }
 
 DJOSER = {"USER_ID_FIELD": "username"}
+
+# LittleLemonAPI reads IDEMPOTENCY, TASK_QUEUE, CATALOG_SNAPSHOT, RESPONSE_CACHE,
+# PROFILING, ORDER_ARCHIVE and ORDER_EVENTS dicts from here; defaults and their
+# meaning live in LittleLemonAPI/conf.py, so only list the keys to override.
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LittleLemon.settings')
 
 application = get_wsgi_application()
+
+from LittleLemonAPI.catalog import preload  # noqa: E402
+
+preload()
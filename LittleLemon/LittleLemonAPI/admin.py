@@ -1,8 +1,42 @@
 from django.contrib import admin
-from .models import Category, MenuItem, Cart, Order, OrderItem
+from .models import (
+    Category,
+    MenuItem,
+    Cart,
+    Order,
+    OrderItem,
+    Task,
+    OrderEvent,
+    ArchivedOrder,
+    ArchivedOrderItem,
+)
+from .summaries import refresh_order_summaries
+
+
+class OrderItemAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        order_ids = {obj.order_id}
+        if change and "order" in form.changed_data:
+            order_ids.add(form.initial["order"])
+        refresh_order_summaries(order_ids, self.model)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        refresh_order_summaries([obj.order_id], self.model)
+
+    def delete_queryset(self, request, queryset):
+        order_ids = set(queryset.values_list("order_id", flat=True))
+        super().delete_queryset(request, queryset)
+        refresh_order_summaries(order_ids, self.model)
+
 
 admin.site.register(Category)
 admin.site.register(MenuItem)
 admin.site.register(Cart)
 admin.site.register(Order)
-admin.site.register(OrderItem)
+admin.site.register(OrderItem, OrderItemAdmin)
+admin.site.register(Task)
+admin.site.register(OrderEvent)
+admin.site.register(ArchivedOrder)
+admin.site.register(ArchivedOrderItem, OrderItemAdmin)
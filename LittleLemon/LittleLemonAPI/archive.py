@@ -0,0 +1,134 @@
+import datetime
+import heapq
+import itertools
+from functools import cmp_to_key
+from django.db import transaction
+from django.db.models import F
+from .conf import get_config
+from .models import Order, OrderItem, ArchivedOrder, ArchivedOrderItem
+
+
+def get_archivable_orders(after_days):
+    cutoff = datetime.date.today() - datetime.timedelta(days=after_days)
+    return Order.objects.filter(status=True, date__lt=cutoff)
+
+
+def archive_batch(after_days, batch_size):
+    with transaction.atomic():
+        orders = list(
+            get_archivable_orders(after_days)
+            .select_for_update()
+            .order_by("id")[:batch_size]
+        )
+        if not orders:
+            return 0
+        order_ids = [order.id for order in orders]
+        ArchivedOrder.objects.bulk_create(
+            [
+                ArchivedOrder(
+                    id=order.id,
+                    user_id=order.user_id,
+                    delivery_crew_id=order.delivery_crew_id,
+                    status=order.status,
+                    total=order.total,
+                    date=order.date,
+                    item_count=order.item_count,
+                    distinct_items=order.distinct_items,
+                    line_summary=order.line_summary,
+                )
+                for order in orders
+            ]
+        )
+        ArchivedOrderItem.objects.bulk_create(
+            [
+                ArchivedOrderItem(
+                    order_id=item.order_id,
+                    menuitem_id=item.menuitem_id,
+                    quantity=item.quantity,
+                    unit_price=item.unit_price,
+                )
+                for item in OrderItem.objects.filter(order_id__in=order_ids)
+            ]
+        )
+        Order.objects.filter(id__in=order_ids).delete()
+    return len(orders)
+
+
+def archive_orders(after_days=None, batch_size=None, max_batches=None):
+    after_days = (
+        get_config("ORDER_ARCHIVE", "AFTER_DAYS") if after_days is None else after_days
+    )
+    batch_size = batch_size or get_config("ORDER_ARCHIVE", "BATCH_SIZE")
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        count = archive_batch(after_days, batch_size)
+        if not count:
+            break
+        archived += count
+        batches += 1
+    return archived
+
+
+def include_archived(request):
+    value = request.query_params.get("include_archived", "")
+    return value.lower() in ["true", "1"]
+
+
+def compare_values(left, right):
+    # NULLs sort first ascending, matching the nulls_first ordering below
+    if left == right:
+        return 0
+    if left is None:
+        return -1
+    if right is None:
+        return 1
+    return -1 if left < right else 1
+
+
+class ArchiveChain:
+    def __init__(self, hot, archived, ordering=()):
+        self.ordering = list(ordering)
+        if not {"id", "-id"} & set(self.ordering):
+            self.ordering.append("id")
+        expressions = [
+            (
+                F(field[1:]).desc(nulls_last=True)
+                if field.startswith("-")
+                else F(field).asc(nulls_first=True)
+            )
+            for field in self.ordering
+        ]
+        self.hot = hot.order_by(*expressions)
+        self.archived = archived.order_by(*expressions)
+        self._hot_count = None
+
+    def hot_count(self):
+        if self._hot_count is None:
+            self._hot_count = self.hot.count()
+        return self._hot_count
+
+    def count(self):
+        return self.hot_count() + self.archived.count()
+
+    def __len__(self):
+        return self.count()
+
+    def compare(self, left, right):
+        for field in self.ordering:
+            name = field.lstrip("-")
+            result = compare_values(getattr(left, name), getattr(right, name))
+            if result:
+                return -result if field.startswith("-") else result
+        return 0
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index : index + 1][0]
+        start = index.start or 0
+        stop = index.stop
+        # Both tables hold rows for the page, so each one is read up to stop
+        merged = heapq.merge(
+            self.hot[:stop], self.archived[:stop], key=cmp_to_key(self.compare)
+        )
+        return list(itertools.islice(merged, start, stop))
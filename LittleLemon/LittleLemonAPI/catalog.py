@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from .conf import get_config
+from .models import Category, MenuItem, CatalogVersion
+
+logger = logging.getLogger(__name__)
+
+CategoryEntry = namedtuple("CategoryEntry", ["id", "slug", "title"])
+MenuItemEntry = namedtuple(
+    "MenuItemEntry", ["id", "title", "price", "featured", "category_id", "category"]
+)
+
+
+class CatalogSnapshot:
+    __slots__ = (
+        "version",
+        "categories",
+        "categories_by_id",
+        "menu_items",
+        "items_by_id",
+        "items_by_category",
+        "featured_items",
+    )
+
+    def __init__(self, version, categories, menu_items):
+        self.version = version
+        self.categories = categories
+        self.categories_by_id = {category.id: category for category in categories}
+        self.menu_items = menu_items
+        self.items_by_id = {item.id: item for item in menu_items}
+        by_category = {}
+        for item in menu_items:
+            by_category.setdefault(item.category_id, []).append(item)
+        self.items_by_category = {
+            category_id: tuple(items) for category_id, items in by_category.items()
+        }
+        self.featured_items = tuple(item for item in menu_items if item.featured)
+
+
+def get_version():
+    version = CatalogVersion.objects.filter(pk=1).values_list("version", flat=True)
+    return version.first() or 0
+
+
+def load_snapshot():
+    version = get_version()
+    categories = tuple(
+        CategoryEntry(*row)
+        for row in Category.objects.order_by("id").values_list("id", "slug", "title")
+    )
+    categories_by_id = {category.id: category for category in categories}
+    menu_items = tuple(
+        MenuItemEntry(
+            item_id,
+            title,
+            price,
+            featured,
+            category_id,
+            categories_by_id[category_id],
+        )
+        for item_id, title, price, featured, category_id in MenuItem.objects.order_by(
+            "id"
+        ).values_list("id", "title", "price", "featured", "category_id")
+    )
+    return CatalogSnapshot(version, categories, menu_items)
+
+
+_snapshot = None
+_checked_at = None
+_lock = threading.Lock()
+
+
+def get_check_interval():
+    return get_config("CATALOG_SNAPSHOT", "CHECK_INTERVAL")
+
+
+def get_snapshot():
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    if _checked_at is not None and now - _checked_at < get_check_interval():
+        return _snapshot
+    with _lock:
+        if _checked_at is None or now - _checked_at >= get_check_interval():
+            if _snapshot is None or get_version() != _snapshot.version:
+                _snapshot = load_snapshot()
+            _checked_at = now
+    return _snapshot
+
+
+def invalidate_snapshot():
+    global _checked_at
+    _checked_at = None
+
+
+def bump_version():
+    if not CatalogVersion.objects.filter(pk=1).update(version=F("version") + 1):
+        CatalogVersion.objects.get_or_create(pk=1, defaults={"version": 1})
+    transaction.on_commit(invalidate_snapshot)
+
+
+def preload():
+    try:
+        get_snapshot()
+    except DatabaseError:
+        logger.warning("Catalog snapshot couldn't be preloaded", exc_info=True)
@@ -0,0 +1,234 @@
+import csv
+import itertools
+import json
+from django.db import transaction
+from django.db.models import Max
+from rest_framework import serializers
+from .catalog import bump_version
+from .models import Category, MenuItem
+from .pricing import reprice_carts
+
+FORMATS = ["csv", "ndjson"]
+MAX_REPORTED_ERRORS = 100
+
+
+class OptionalBooleanField(serializers.BooleanField):
+    def to_internal_value(self, data):
+        # Blank CSV cells mean the flag isn't set
+        if data == "":
+            return False
+        return super().to_internal_value(data)
+
+
+class CatalogRowSerializer(serializers.Serializer):
+    category_slug = serializers.SlugField()
+    category_title = serializers.CharField(max_length=255)
+    title = serializers.CharField(max_length=255)
+    price = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0)
+    featured = OptionalBooleanField(default=False)
+
+
+def get_format(name, default="csv"):
+    extension = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    if extension in ["ndjson", "jsonl"]:
+        return "ndjson"
+    if extension == "csv":
+        return "csv"
+    return default
+
+
+def iter_lines(stream):
+    # Decoded one line at a time so a bad line is rejected on its own
+    for number, line in enumerate(stream):
+        if isinstance(line, bytes):
+            try:
+                line = line.decode("utf-8-sig" if number == 0 else "utf-8")
+            except UnicodeDecodeError:
+                line = None
+        elif number == 0:
+            line = line.lstrip("\ufeff")
+        yield line
+
+
+def iter_csv_rows(lines):
+    header = next(lines, "")
+    if header is None:
+        raise serializers.ValidationError(
+            {"message": "The header row isn't valid UTF-8"}
+        )
+    skipped = 0
+
+    def decoded():
+        nonlocal skipped
+        yield header
+        for line in lines:
+            if line is None:
+                skipped += 1
+            else:
+                yield line
+
+    for row in csv.DictReader(decoded()):
+        while skipped:
+            skipped -= 1
+            yield None
+        yield row
+    yield from [None] * skipped
+
+
+def iter_rows(stream, fmt):
+    lines = iter_lines(stream)
+    if fmt == "csv":
+        yield from iter_csv_rows(lines)
+    else:
+        for line in lines:
+            if line is None:
+                yield None
+                continue
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield {}
+
+
+class CatalogImport:
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.report = {
+            "categories": {"added": 0, "changed": 0},
+            "menu_items": {"added": 0, "changed": 0, "unchanged": 0, "removed": 0},
+            "carts_repriced": 0,
+            "rejected": 0,
+            "errors": [],
+        }
+        self.existing_count = MenuItem.objects.count()
+        self.existing_max_id = MenuItem.objects.aggregate(Max("id"))["id__max"] or 0
+        self.matched = 0
+
+    def run(self, rows):
+        rows = iter(rows)
+        row_number = 0
+        while chunk := list(itertools.islice(rows, self.chunk_size)):
+            self.import_chunk(chunk, row_number)
+            row_number += len(chunk)
+        self.report["menu_items"]["removed"] = max(
+            self.existing_count - self.matched, 0
+        )
+        return self.report
+
+    def reject(self, row_number, errors):
+        self.report["rejected"] += 1
+        if len(self.report["errors"]) < MAX_REPORTED_ERRORS:
+            self.report["errors"].append({"row": row_number, "errors": errors})
+
+    def validate_chunk(self, chunk, first_row):
+        # Undecodable lines arrive as None and are rejected before validation
+        numbers = []
+        rows = []
+        for offset, row in enumerate(chunk):
+            if row is None:
+                self.reject(first_row + offset + 1, ["This line isn't valid UTF-8"])
+            else:
+                numbers.append(first_row + offset + 1)
+                rows.append(row)
+        serializer = CatalogRowSerializer(data=rows, many=True)
+        if serializer.is_valid():
+            return serializer.validated_data
+        chunk_errors = serializer.errors
+        if not isinstance(chunk_errors, dict):
+            chunk_errors = dict(enumerate(chunk_errors))
+        valid = []
+        for index, row in enumerate(rows):
+            errors = chunk_errors.get(index)
+            if errors:
+                self.reject(numbers[index], errors)
+            else:
+                valid.append(serializer.child.run_validation(row))
+        return valid
+
+    def import_chunk(self, chunk, first_row):
+        rows = self.validate_chunk(chunk, first_row)
+        if not rows:
+            return
+        with transaction.atomic():
+            categories = self.upsert_categories(rows)
+            self.upsert_menu_items(rows, categories)
+            bump_version()
+
+    def upsert_categories(self, rows):
+        titles = {row["category_slug"]: row["category_title"] for row in rows}
+        categories = {}
+        for category in Category.objects.filter(slug__in=titles).order_by("-id"):
+            categories[category.slug] = category
+        changed = []
+        for slug, category in categories.items():
+            if category.title != titles[slug]:
+                category.title = titles[slug]
+                changed.append(category)
+        Category.objects.bulk_update(changed, ["title"])
+        added = Category.objects.bulk_create(
+            [
+                Category(slug=slug, title=title)
+                for slug, title in titles.items()
+                if slug not in categories
+            ]
+        )
+        if added and added[0].pk is None:
+            added = Category.objects.filter(
+                slug__in=[category.slug for category in added]
+            )
+        for category in added:
+            categories.setdefault(category.slug, category)
+        self.report["categories"]["added"] += len(added)
+        self.report["categories"]["changed"] += len(changed)
+        return categories
+
+    def upsert_menu_items(self, rows, categories):
+        values = {}
+        for row in rows:
+            key = (categories[row["category_slug"]].id, row["title"])
+            values[key] = (row["price"], row["featured"])
+        existing = MenuItem.objects.filter(
+            category_id__in={key[0] for key in values},
+            title__in={key[1] for key in values},
+        )
+        existing = {(item.category_id, item.title): item for item in existing}
+        changed = []
+        repriced = []
+        unchanged = 0
+        for key, item in existing.items():
+            if key not in values:
+                continue
+            # Newer ids were added by an earlier chunk and already counted there
+            counted = item.id <= self.existing_max_id
+            self.matched += counted
+            price, featured = values[key]
+            if item.price == price and item.featured == featured:
+                unchanged += counted
+                continue
+            if item.price != price:
+                repriced.append(item)
+            item.price = price
+            item.featured = featured
+            changed.append(item)
+        MenuItem.objects.bulk_update(changed, ["price", "featured"])
+        changed_count = sum(item.id <= self.existing_max_id for item in changed)
+        added = MenuItem.objects.bulk_create(
+            [
+                MenuItem(
+                    category_id=key[0], title=key[1], price=price, featured=featured
+                )
+                for key, (price, featured) in values.items()
+                if key not in existing
+            ]
+        )
+        for item in repriced:
+            self.report["carts_repriced"] += reprice_carts(item.id, item.price)
+        self.report["menu_items"]["added"] += len(added)
+        self.report["menu_items"]["changed"] += changed_count
+        self.report["menu_items"]["unchanged"] += unchanged
+
+
+def import_catalog(stream, fmt="csv", chunk_size=1000):
+    return CatalogImport(chunk_size).run(iter_rows(stream, fmt))
@@ -0,0 +1,49 @@
+from django.conf import settings
+
+# Defaults for the app's settings dicts. A dict with the same name in
+# settings.py only needs the keys it overrides.
+DEFAULTS = {
+    # Stored in the database so every worker sees the same keys
+    "IDEMPOTENCY": {
+        "TTL": 24 * 60 * 60,
+        "WAIT_TIMEOUT": 30,
+        "LOCK_TIMEOUT": 60,
+        "POLL_INTERVAL": 0.1,
+    },
+    # Set WORKERS to 0 to only run tasks through the run_tasks command
+    "TASK_QUEUE": {
+        "WORKERS": 1,
+        "POLL_INTERVAL": 5,
+        "BATCH_SIZE": 10,
+        "MAX_ATTEMPTS": 5,
+        "BACKOFF": 10,
+        "LEASE": 300,
+    },
+    # Seconds between checks of the shared catalog version
+    "CATALOG_SNAPSHOT": {"CHECK_INTERVAL": 1},
+    # Rendered menu responses, with gzip/brotli variants, keyed by catalog version
+    "RESPONSE_CACHE": {"MAX_BYTES": 16 * 1024 * 1024, "MIN_COMPRESS_SIZE": 512},
+    # Admins can profile a single request by sending the X-Profile-Request
+    # header; DIRECTORY defaults to BASE_DIR / "profiles"
+    "PROFILING": {
+        "ENABLED": False,
+        "SAMPLE_RATE": 0,
+        "DIRECTORY": None,
+        "MAX_BYTES": 50 * 1024 * 1024,
+    },
+    "ORDER_ARCHIVE": {"AFTER_DAYS": 30, "BATCH_SIZE": 500},
+    # Each open stream holds a worker thread under WSGI; serve asgi.py in production
+    "ORDER_EVENTS": {
+        "POLL_INTERVAL": 1,
+        "KEEP_ALIVE": 15,
+        "MAX_DURATION": 300,
+        "BATCH_SIZE": 100,
+        # Seconds events are kept for reconnecting clients; see prune_order_events
+        "RETENTION": 7 * 24 * 60 * 60,
+        "PRUNE_BATCH_SIZE": 1000,
+    },
+}
+
+
+def get_config(setting, name):
+    return getattr(settings, setting, {}).get(name, DEFAULTS[setting][name])
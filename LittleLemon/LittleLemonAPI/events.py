@@ -0,0 +1,141 @@
+import asyncio
+import datetime
+import json
+import time
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from .conf import get_config
+from .models import OrderEvent
+
+RETRY_CHUNK = "retry: 3000\n\n"
+
+
+def build_order_event(order, kind):
+    return OrderEvent(
+        order_id=order.id,
+        user_id=order.user_id,
+        delivery_crew_id=order.delivery_crew_id,
+        kind=kind,
+        payload={
+            "id": order.id,
+            "user_id": order.user_id,
+            "delivery_crew_id": order.delivery_crew_id,
+            "status": bool(order.status),
+            "total": str(order.total),
+            "date": order.date.isoformat(),
+        },
+    )
+
+
+def publish_order_event(order, kind):
+    event = build_order_event(order, kind)
+    event.save()
+    return event
+
+
+def publish_order_events(orders, kind):
+    return OrderEvent.objects.bulk_create(
+        [build_order_event(order, kind) for order in orders]
+    )
+
+
+def prune_order_events(retention=None, batch_size=None):
+    if retention is None:
+        retention = get_config("ORDER_EVENTS", "RETENTION")
+    batch_size = batch_size or get_config("ORDER_EVENTS", "PRUNE_BATCH_SIZE")
+    cutoff = timezone.now() - datetime.timedelta(seconds=retention)
+    pruned = 0
+    while True:
+        event_ids = list(
+            OrderEvent.objects.filter(created__lt=cutoff)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not event_ids:
+            break
+        pruned += OrderEvent.objects.filter(id__in=event_ids).delete()[0]
+    return pruned
+
+
+def get_event_scope(user):
+    groups = set(user.groups.values_list("name", flat=True))
+    if "Manager" in groups:
+        return Q()
+    if "Delivery_crew" in groups:
+        return Q(delivery_crew_id=user.id)
+    if not groups and not user.is_superuser:
+        return Q(user_id=user.id)
+    return None
+
+
+def get_last_event_id():
+    last = OrderEvent.objects.order_by("-id").values_list("id", flat=True).first()
+    return last or 0
+
+
+def fetch_events(scope, after_id):
+    return list(
+        OrderEvent.objects.filter(scope, id__gt=after_id)
+        .order_by("id")
+        .values_list("id", "kind", "payload")[
+            : get_config("ORDER_EVENTS", "BATCH_SIZE")
+        ]
+    )
+
+
+def format_event(event_id, kind, payload):
+    data = json.dumps(payload, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {kind}\ndata: {data}\n\n"
+
+
+class OrderEventStream:
+    def __init__(self, scope, last_event_id, clock):
+        self.scope = scope
+        self.last_event_id = last_event_id
+        self.clock = clock
+        self.deadline = clock() + get_config("ORDER_EVENTS", "MAX_DURATION")
+        self.keep_alive_at = clock() + get_config("ORDER_EVENTS", "KEEP_ALIVE")
+
+    def is_open(self):
+        return self.clock() < self.deadline
+
+    def fetch(self):
+        return fetch_events(self.scope, self.last_event_id)
+
+    def process(self, events):
+        chunks = []
+        for event_id, kind, payload in events:
+            self.last_event_id = event_id
+            chunks.append(format_event(event_id, kind, payload))
+        if events:
+            self.keep_alive_at = self.clock() + get_config("ORDER_EVENTS", "KEEP_ALIVE")
+            # A full batch means more events are waiting, so fetch again at once
+            return chunks, len(events) < get_config("ORDER_EVENTS", "BATCH_SIZE")
+        if self.clock() >= self.keep_alive_at:
+            self.keep_alive_at = self.clock() + get_config("ORDER_EVENTS", "KEEP_ALIVE")
+            chunks.append(": keep-alive\n\n")
+        return chunks, True
+
+
+def iter_order_events(scope, last_event_id):
+    stream = OrderEventStream(scope, last_event_id, time.monotonic)
+    yield RETRY_CHUNK
+    while stream.is_open():
+        chunks, wait = stream.process(stream.fetch())
+        yield from chunks
+        if wait:
+            time.sleep(get_config("ORDER_EVENTS", "POLL_INTERVAL"))
+
+
+async def stream_order_events(scope, last_event_id):
+    loop = asyncio.get_running_loop()
+    stream = OrderEventStream(scope, last_event_id, loop.time)
+    yield RETRY_CHUNK
+    while stream.is_open():
+        chunks, wait = stream.process(await sync_to_async(stream.fetch)())
+        for chunk in chunks:
+            yield chunk
+        if wait:
+            await asyncio.sleep(get_config("ORDER_EVENTS", "POLL_INTERVAL"))
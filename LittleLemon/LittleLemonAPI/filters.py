@@ -0,0 +1,175 @@
+import datetime
+import operator
+from decimal import Decimal
+from operator import attrgetter
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.exceptions import ValidationError
+
+LOOKUP_SEPARATOR = "__"
+ORDERING_PARAM = "ordering"
+RANGE_LOOKUPS = ["exact", "lt", "lte", "gt", "gte", "in"]
+
+
+# Bounds of a signed 64-bit column; larger values overflow the database driver
+MIN_INT = -(2**63)
+MAX_INT = 2**63 - 1
+
+
+def parse_int(value):
+    value = int(value)
+    if not MIN_INT <= value <= MAX_INT:
+        raise ValueError(value)
+    return value
+
+
+def parse_bool(value):
+    value = value.lower()
+    if value in ["true", "1"]:
+        return True
+    if value in ["false", "0"]:
+        return False
+    raise ValueError(value)
+
+
+def parse_decimal(value):
+    value = Decimal(value)
+    if not value.is_finite():
+        raise ValueError(value)
+    return value
+
+
+PARSERS = {
+    str: str,
+    int: parse_int,
+    bool: parse_bool,
+    Decimal: parse_decimal,
+    datetime.date: datetime.date.fromisoformat,
+}
+
+OPERATORS = {
+    "exact": operator.eq,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "in": lambda value, options: value in options,
+    "icontains": lambda value, term: term.casefold() in value.casefold(),
+    "isnull": lambda value, isnull: (value is None) == isnull,
+}
+
+
+class Filter:
+    def __init__(self, type, lookups=("exact",), field=None):
+        if type not in PARSERS:
+            raise ImproperlyConfigured(f"Unsupported filter type: {type}")
+        for lookup in lookups:
+            if lookup not in OPERATORS:
+                raise ImproperlyConfigured(f"Unsupported filter lookup: {lookup}")
+        self.type = type
+        self.lookups = lookups
+        self.field = field
+
+
+class RequestFilters:
+    def __init__(self, conditions, ordering):
+        self.conditions = conditions
+        self.ordering = ordering
+
+    def get(self, field, lookup="exact"):
+        for condition in self.conditions:
+            if condition[:2] == (field, lookup):
+                return condition[2]
+        return None
+
+    def filter_queryset(self, queryset):
+        lookups = {}
+        for field, lookup, value in self.conditions:
+            key = field if lookup == "exact" else f"{field}{LOOKUP_SEPARATOR}{lookup}"
+            lookups[key] = value
+        queryset = queryset.filter(**lookups)
+        if self.ordering:
+            queryset = queryset.order_by(*self.ordering)
+        return queryset
+
+    def filter_entries(self, entries):
+        for field, lookup, value in self.conditions:
+            get_value = attrgetter(field)
+            compare = OPERATORS[lookup]
+            entries = [
+                entry
+                for entry in entries
+                if (lookup == "isnull" or get_value(entry) is not None)
+                and compare(get_value(entry), value)
+            ]
+        entries = list(entries)
+        for field in reversed(self.ordering):
+            entries.sort(
+                key=attrgetter(field.lstrip("-")), reverse=field.startswith("-")
+            )
+        return entries
+
+
+class FilterEngine:
+    def __init__(self, filter_fields, ordering_fields, ordering):
+        self.names = set(filter_fields)
+        self.params = {}
+        for name, declared in filter_fields.items():
+            field = declared.field or name
+            for lookup in declared.lookups:
+                parse = parse_bool if lookup == "isnull" else PARSERS[declared.type]
+                key = name if lookup == "exact" else f"{name}{LOOKUP_SEPARATOR}{lookup}"
+                self.params[key] = (field, lookup, parse)
+        self.ordering_fields = set(ordering_fields)
+        self.ordering_fields.update(f"-{field}" for field in ordering_fields)
+        self.default_ordering = list(ordering)
+
+    def parse_value(self, lookup, parse, raw):
+        if lookup == "in":
+            return [parse(value) for value in raw.split(",") if value]
+        return parse(raw)
+
+    def parse(self, query_params, strict=False):
+        # Strict parsing is for filters that select rows to change, where an
+        # ignored key would widen the selection
+        errors = {}
+        conditions = []
+        for key, raw in query_params.items():
+            spec = self.params.get(key)
+            if spec is None:
+                if key.split(LOOKUP_SEPARATOR, 1)[0] in self.names:
+                    errors[key] = "This lookup isn't supported"
+                elif strict:
+                    errors[key] = "This filter isn't supported"
+                continue
+            field, lookup, parse = spec
+            try:
+                conditions.append((field, lookup, self.parse_value(lookup, parse, raw)))
+            except (ValueError, ArithmeticError):
+                errors[key] = f"'{raw}' isn't a valid value"
+        ordering = self.default_ordering
+        raw_ordering = query_params.get(ORDERING_PARAM)
+        if raw_ordering:
+            ordering = [field.strip() for field in raw_ordering.split(",")]
+            invalid = [field for field in ordering if field not in self.ordering_fields]
+            if invalid:
+                errors[ORDERING_PARAM] = f"Can't order by {', '.join(invalid)}"
+        if errors:
+            raise ValidationError(
+                {"message": "Invalid query parameters", "errors": errors}
+            )
+        return RequestFilters(conditions, ordering)
+
+
+_engines = {}
+
+
+def get_filter_engine(view_class):
+    engine = _engines.get(view_class)
+    if engine is None:
+        engine = FilterEngine(
+            getattr(view_class, "filter_fields", {}),
+            getattr(view_class, "ordering_fields", []),
+            getattr(view_class, "ordering", None) or [],
+        )
+        _engines[view_class] = engine
+    return engine
@@ -0,0 +1,123 @@
+import datetime
+import hashlib
+import json
+import time
+from functools import wraps
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from .conf import get_config
+from .models import IdempotencyRecord
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = {"message": "A request with this idempotency key is in progress"}
+
+
+def get_record_key(user_id, path, idempotency_key):
+    raw = f"{user_id}:{path}:{idempotency_key}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def get_fingerprint(request):
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    payload = JSONRenderer().render(
+        {"method": request.method, "path": request.path, "data": data}
+    )
+    return hashlib.sha256(payload).hexdigest()
+
+
+def claim(key, fingerprint):
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            IdempotencyRecord.objects.create(
+                key=key,
+                fingerprint=fingerprint,
+                locked_until=now
+                + datetime.timedelta(seconds=get_config("IDEMPOTENCY", "LOCK_TIMEOUT")),
+                expires_at=now
+                + datetime.timedelta(seconds=get_config("IDEMPOTENCY", "TTL")),
+            )
+        return True
+    except IntegrityError:
+        return False
+
+
+def begin(key, fingerprint):
+    deadline = time.monotonic() + get_config("IDEMPOTENCY", "WAIT_TIMEOUT")
+    while True:
+        if claim(key, fingerprint):
+            return None
+        record = IdempotencyRecord.objects.filter(key=key).first()
+        if record is None:
+            continue
+        now = timezone.now()
+        abandoned = record.status_code is None and record.locked_until <= now
+        if record.expires_at <= now or abandoned:
+            # Only one of the racing requests deletes the stale row and claims it
+            IdempotencyRecord.objects.filter(
+                pk=record.pk, locked_until=record.locked_until
+            ).delete()
+            continue
+        if record.fingerprint != fingerprint:
+            raise ValidationError(
+                {
+                    "message": "The idempotency key was already used for a different request"
+                }
+            )
+        if record.status_code is not None:
+            return record
+        if time.monotonic() >= deadline:
+            raise IdempotencyConflict()
+        time.sleep(get_config("IDEMPOTENCY", "POLL_INTERVAL"))
+
+
+def finish(key, response=None):
+    records = IdempotencyRecord.objects.filter(key=key)
+    if response is None:
+        records.delete()
+    else:
+        records.update(
+            status_code=response.status_code,
+            body=JSONRenderer().render(response.data).decode(),
+        )
+    IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()).delete()
+
+
+def idempotent(method):
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not idempotency_key:
+            return method(self, request, *args, **kwargs)
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            raise ValidationError({"message": "The idempotency key is too long"})
+        key = get_record_key(request.user.id, request.path, idempotency_key)
+        record = begin(key, get_fingerprint(request))
+        if record is not None:
+            return Response(
+                json.loads(record.body) if record.body else None,
+                status=record.status_code,
+                headers={"Idempotent-Replayed": "true"},
+            )
+        response = None
+        try:
+            response = method(self, request, *args, **kwargs)
+        finally:
+            if response is not None and response.status_code < 500:
+                finish(key, response)
+            else:
+                finish(key)
+        return response
+
+    return wrapper
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.conf import get_config
+from LittleLemonAPI.archive import archive_orders
+
+
+class Command(BaseCommand):
+    help = "Moves delivered orders older than the configured age to the archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=get_config("ORDER_ARCHIVE", "AFTER_DAYS")
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=get_config("ORDER_ARCHIVE", "BATCH_SIZE")
+        )
+        parser.add_argument("--max-batches", type=int)
+
+    def handle(self, *args, **options):
+        archived = archive_orders(
+            options["days"], options["batch_size"], options["max_batches"]
+        )
+        self.stdout.write(f"Archived {archived} order(s)")
@@ -0,0 +1,24 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from LittleLemonAPI.catalog_import import FORMATS, get_format, import_catalog
+
+
+class Command(BaseCommand):
+    help = "Imports categories and menu items from a CSV or NDJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or get_format(options["path"])
+        try:
+            with open(options["path"], "rb") as stream:
+                report = import_catalog(stream, fmt, options["chunk_size"])
+        except OSError as e:
+            raise CommandError(str(e))
+        except ValidationError as e:
+            raise CommandError(e.detail["message"])
+        self.stdout.write(json.dumps(report, indent=2, default=str))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.conf import get_config
+from LittleLemonAPI.events import prune_order_events
+
+
+class Command(BaseCommand):
+    help = "Deletes order events older than the configured retention"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seconds", type=int, default=get_config("ORDER_EVENTS", "RETENTION")
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=get_config("ORDER_EVENTS", "PRUNE_BATCH_SIZE"),
+        )
+
+    def handle(self, *args, **options):
+        pruned = prune_order_events(options["seconds"], options["batch_size"])
+        self.stdout.write(f"Pruned {pruned} order event(s)")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.models import Order, OrderItem, ArchivedOrder, ArchivedOrderItem
+from LittleLemonAPI.summaries import refresh_order_summaries
+
+
+class Command(BaseCommand):
+    help = "Recomputes the denormalized item summaries stored on orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        repaired = 0
+        for order_model, item_model in [
+            (Order, OrderItem),
+            (ArchivedOrder, ArchivedOrderItem),
+        ]:
+            repaired += self.repair(order_model, item_model, options["batch_size"])
+        self.stdout.write(f"Repaired {repaired} order summary(ies)")
+
+    def repair(self, order_model, item_model, batch_size):
+        last_id = 0
+        repaired = 0
+        while True:
+            order_ids = list(
+                order_model.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not order_ids:
+                break
+            repaired += refresh_order_summaries(order_ids, item_model)
+            last_id = order_ids[-1]
+        return repaired
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.conf import get_config
+from LittleLemonAPI.taskqueue import WorkerPool, run_pending
+
+
+class Command(BaseCommand):
+    help = "Runs queued background tasks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=get_config("TASK_QUEUE", "WORKERS") or 1
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=get_config("TASK_QUEUE", "POLL_INTERVAL"),
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run every due task and exit instead of polling",
+        )
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            total = 0
+            while processed := run_pending():
+                total += processed
+            self.stdout.write(f"Ran {total} task(s)")
+            return
+        pool = WorkerPool(options["workers"], options["poll_interval"])
+        pool.start()
+        try:
+            pool.join()
+        except KeyboardInterrupt:
+            pool.stop()
+            pool.join()
@@ -0,0 +1,119 @@
+import cProfile
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from .conf import get_config
+
+PROFILE_HEADER = "X-Profile-Request"
+
+# Only one profiler can be active per process (sys.monitoring on 3.12+)
+profiler_lock = threading.Lock()
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not get_config("PROFILING", "ENABLED"):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sample_rate = get_config("PROFILING", "SAMPLE_RATE")
+        directory = get_config("PROFILING", "DIRECTORY")
+        self.directory = Path(directory or settings.BASE_DIR / "profiles")
+        self.max_bytes = get_config("PROFILING", "MAX_BYTES")
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        if not profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.profile(request)
+        finally:
+            profiler_lock.release()
+
+    def profile(self, request):
+        queries = []
+
+        def record_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append(
+                    {"sql": sql, "many": many, "time": time.perf_counter() - start}
+                )
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # A profiler started outside this middleware holds the hook
+            return self.get_response(request)
+        start = time.perf_counter()
+        with connection.execute_wrapper(record_query):
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed = time.perf_counter() - start
+        response["X-Profile-Id"] = self.save(request, profiler, queries, elapsed)
+        return response
+
+    def should_profile(self, request):
+        if PROFILE_HEADER in request.headers:
+            return self.is_admin(request)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def is_admin(self, request):
+        try:
+            authenticated = TokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        user = authenticated[0] if authenticated else request.user
+        return user.is_superuser
+
+    def save(self, request, profiler, queries, elapsed):
+        path = re.sub(r"[^A-Za-z0-9]+", "-", request.path).strip("-") or "root"
+        profile_id = (
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-"
+            f"{uuid.uuid4().hex[:8]}-{request.method}-{path[:80]}"
+        )
+        profiler.dump_stats(self.directory / f"{profile_id}.prof")
+        with open(self.directory / f"{profile_id}.sql.json", "w") as sql_file:
+            json.dump(
+                {
+                    "method": request.method,
+                    "path": request.get_full_path(),
+                    "time": elapsed,
+                    "query_count": len(queries),
+                    "query_time": sum(query["time"] for query in queries),
+                    "queries": queries,
+                },
+                sql_file,
+                indent=2,
+            )
+        self.rotate()
+        return profile_id
+
+    def rotate(self):
+        files = sorted(
+            (entry.stat().st_mtime, entry.stat().st_size, entry)
+            for entry in self.directory.iterdir()
+            if entry.is_file()
+        )
+        total = sum(size for _, size, _ in files)
+        for _, size, entry in files:
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
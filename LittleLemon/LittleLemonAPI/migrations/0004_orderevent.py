@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LittleLemonAPI', '0003_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.BigIntegerField()),
+                ('user_id', models.BigIntegerField(db_index=True)),
+                ('delivery_crew_id', models.BigIntegerField(db_index=True, null=True)),
+                ('kind', models.CharField(max_length=32)),
+                ('payload', models.JSONField(default=dict)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
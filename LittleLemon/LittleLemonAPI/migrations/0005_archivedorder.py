@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0004_orderevent"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedOrder",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("status", models.BooleanField(default=0)),
+                ("total", models.DecimalField(decimal_places=2, max_digits=6)),
+                ("date", models.DateField(db_index=True)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "delivery_crew",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archived_delivery_crew",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ArchivedOrderItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.SmallIntegerField()),
+                ("unit_price", models.DecimalField(decimal_places=2, max_digits=6)),
+                (
+                    "menuitem",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="LittleLemonAPI.menuitem",
+                    ),
+                ),
+                (
+                    "order",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="orderitem_set",
+                        to="LittleLemonAPI.archivedorder",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("order", "menuitem")},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:13
+
+from django.db import migrations, models
+
+
+def create_catalog_version(apps, schema_editor):
+    CatalogVersion = apps.get_model("LittleLemonAPI", "CatalogVersion")
+    CatalogVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0005_archivedorder"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_catalog_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0006_catalogversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedorder",
+            name="distinct_items",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="archivedorder",
+            name="item_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="archivedorder",
+            name="line_summary",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="distinct_items",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="item_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="line_summary",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0008_idempotencyrecord"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="orderevent",
+            name="created",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
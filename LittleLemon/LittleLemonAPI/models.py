@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 
@@ -36,6 +37,9 @@ class Order(models.Model):
     status = models.BooleanField(db_index=True, default=0)
     total = models.DecimalField(max_digits=6, decimal_places=2)
     date = models.DateField(db_index=True)
+    item_count = models.PositiveIntegerField(default=0)
+    distinct_items = models.PositiveSmallIntegerField(default=0)
+    line_summary = models.CharField(max_length=255, blank=True, default='')
 
 
 class OrderItem(models.Model):
@@ -46,3 +50,79 @@ class OrderItem(models.Model):
 
     class Meta:
         unique_together = ('order', 'menuitem')
+
+
+class Task(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.SmallIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_at'])]
+
+
+class OrderEvent(models.Model):
+    order_id = models.BigIntegerField()
+    user_id = models.BigIntegerField(db_index=True)
+    delivery_crew_id = models.BigIntegerField(db_index=True, null=True)
+    kind = models.CharField(max_length=32)
+    payload = models.JSONField(default=dict)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
+class ArchivedOrder(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    delivery_crew = models.ForeignKey(
+        User, on_delete=models.SET_NULL,
+        related_name='archived_delivery_crew',
+        null=True,
+        blank=True
+    )
+    status = models.BooleanField(default=0)
+    total = models.DecimalField(max_digits=6, decimal_places=2)
+    date = models.DateField(db_index=True)
+    item_count = models.PositiveIntegerField(default=0)
+    distinct_items = models.PositiveSmallIntegerField(default=0)
+    line_summary = models.CharField(max_length=255, blank=True, default='')
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+
+class ArchivedOrderItem(models.Model):
+    order = models.ForeignKey(
+        ArchivedOrder, on_delete=models.CASCADE, related_name='orderitem_set'
+    )
+    menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
+    quantity = models.SmallIntegerField()
+    unit_price = models.DecimalField(max_digits=6, decimal_places=2)
+
+    class Meta:
+        unique_together = ('order', 'menuitem')
+
+
+class CatalogVersion(models.Model):
+    version = models.PositiveBigIntegerField(default=0)
+
+
+class IdempotencyRecord(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.SmallIntegerField(null=True)
+    body = models.TextField(blank=True)
+    locked_until = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models import F
+from rest_framework.exceptions import NotFound
+from .catalog import bump_version
+from .models import Cart, MenuItem
+
+
+def reprice_carts(menuitem_id, unit_price):
+    return (
+        Cart.objects.filter(menuitem_id=menuitem_id)
+        .exclude(unit_price=unit_price)
+        .update(unit_price=unit_price, price=F("quantity") * unit_price)
+    )
+
+
+def update_menu_item_prices(prices):
+    with transaction.atomic():
+        menuitems = MenuItem.objects.select_for_update().filter(pk__in=prices.keys())
+        menuitems = {menuitem.id: menuitem for menuitem in menuitems}
+        missing = sorted(set(prices) - set(menuitems))
+        if missing:
+            raise NotFound(
+                {"message": "Some menu items don't exist", "menuitem_ids": missing}
+            )
+        changed = []
+        for menuitem_id, price in prices.items():
+            menuitem = menuitems[menuitem_id]
+            if menuitem.price != price:
+                menuitem.price = price
+                changed.append(menuitem)
+        MenuItem.objects.bulk_update(changed, ["price"])
+        if changed:
+            bump_version()
+        carts_repriced = 0
+        for menuitem in changed:
+            carts_repriced += reprice_carts(menuitem.id, menuitem.price)
+    return {"updated": len(changed), "carts_repriced": carts_repriced}
@@ -0,0 +1,111 @@
+import gzip
+import threading
+from collections import OrderedDict
+from .conf import get_config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class CachedBody:
+    __slots__ = ("bodies",)
+
+    def __init__(self, body):
+        self.bodies = {"identity": body}
+        if len(body) >= get_config("RESPONSE_CACHE", "MIN_COMPRESS_SIZE"):
+            self.bodies["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(body)
+
+    @property
+    def size(self):
+        return sum(len(body) for body in self.bodies.values())
+
+    def negotiate(self, accept_encoding):
+        accepted = parse_accept_encoding(accept_encoding)
+        best = "identity"
+        best_size = len(self.bodies["identity"])
+        for encoding, body in self.bodies.items():
+            quality = accepted.get(encoding, accepted.get("*", 0))
+            if quality > 0 and len(body) < best_size:
+                best, best_size = encoding, len(body)
+        return best, self.bodies[best]
+
+
+def parse_accept_encoding(header):
+    accepted = {}
+    for part in header.split(","):
+        encoding, _, params = part.strip().partition(";")
+        if not encoding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0
+        accepted[encoding.strip().lower()] = quality
+    return accepted
+
+
+class ResponseCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.version = None
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version, key):
+        with self._lock:
+            if version != self.version:
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, version, key, body):
+        entry = CachedBody(body)
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.size = 0
+                self.version = version
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+            if entry.size > self.max_bytes:
+                return entry
+            self._entries[key] = entry
+            self.size += entry.size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.version = None
+
+
+def get_cache_key(path, filters, page):
+    # Built from parsed filters so equivalent query strings share an entry
+    conditions = sorted(
+        (
+            (field, lookup, tuple(value) if isinstance(value, list) else value)
+            for field, lookup, value in filters.conditions
+        ),
+        key=lambda condition: condition[:2],
+    )
+    if page is None or page.isdigit():
+        page = int(page or 1)
+    return (path, tuple(conditions), tuple(filters.ordering), page)
+
+
+catalog_cache = ResponseCache(get_config("RESPONSE_CACHE", "MAX_BYTES"))
@@ -2,6 +2,7 @@ from django.db import transaction
 from rest_framework import serializers
 from rest_framework.exceptions import ParseError
 from django.contrib.auth.models import User
+from .filters import MAX_INT
 from .models import Category, MenuItem, Cart, Order, OrderItem
 
 
@@ -20,6 +21,11 @@ class MenuItemSerializer(serializers.ModelSerializer):
         fields = ["id", "title", "price", "featured", "category", "category_id"]
 
 
+class MenuItemPriceSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0)
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -58,7 +64,9 @@ class CartSerializer(serializers.ModelSerializer):
         unit_price = None
         price = None
         try:
-            unit_price = MenuItem.objects.get(pk=menuitem_id).price
+            # Not from the catalog snapshot: another worker's copy can predate a
+            # price change that has already repriced the existing carts
+            unit_price = MenuItem.objects.only("price").get(pk=menuitem_id).price
             price = quantity * unit_price
         except MenuItem.DoesNotExist:
             raise serializers.ValidationError("Menu item doesn't exist")
@@ -102,15 +110,61 @@ class OrderSerializer(serializers.ModelSerializer):
             "orderitem_set",
             "total",
             "date",
+            "item_count",
+            "distinct_items",
+            "line_summary",
         ]
+        read_only_fields = ["item_count", "distinct_items", "line_summary"]
 
     def create(self, validated_data):
         order_items = validated_data.pop("orderitem_set", [])
         with transaction.atomic():
             order = Order.objects.create(**validated_data)
-            order.order_items = []
-            for order_item in order_items:
-                order.order_items.append(
-                    OrderItem.objects.create(order=order, **order_item)
-                )
+            order.order_items = OrderItem.objects.bulk_create(
+                [OrderItem(order=order, **order_item) for order_item in order_items]
+            )
         return order
+
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "user_id",
+            "delivery_crew_id",
+            "status",
+            "total",
+            "date",
+            "item_count",
+            "distinct_items",
+            "line_summary",
+        ]
+
+
+class OrderBulkUpdateSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=MAX_INT),
+        required=False,
+        allow_empty=False,
+    )
+    filter = serializers.DictField(required=False, allow_empty=False)
+    all = serializers.BooleanField(required=False)
+    status = serializers.BooleanField(required=False)
+    delivery_crew_id = serializers.IntegerField(
+        required=False, allow_null=True, min_value=1, max_value=MAX_INT
+    )
+
+    def validate(self, data):
+        selectors = ["ids" in data, "filter" in data, data.get("all", False)]
+        if selectors.count(True) != 1:
+            raise serializers.ValidationError(
+                {
+                    "message": "Provide exactly one of a list of order ids, a filter or all set to true"
+                }
+            )
+        if "status" not in data and "delivery_crew_id" not in data:
+            raise serializers.ValidationError(
+                {"message": "Provide a status or a delivery crew to update"}
+            )
+        return data
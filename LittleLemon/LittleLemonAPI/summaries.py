@@ -0,0 +1,47 @@
+from django.db import transaction
+from .models import OrderItem
+
+LINE_SUMMARY_LENGTH = 255
+SUMMARY_FIELDS = ["item_count", "distinct_items", "line_summary"]
+
+
+def build_summary(lines):
+    item_count = 0
+    parts = []
+    for title, quantity in lines:
+        item_count += quantity
+        parts.append(f"{quantity}x {title}")
+    line_summary = ", ".join(parts)
+    if len(line_summary) > LINE_SUMMARY_LENGTH:
+        line_summary = line_summary[: LINE_SUMMARY_LENGTH - 3].rstrip(", ") + "..."
+    return {
+        "item_count": item_count,
+        "distinct_items": len(parts),
+        "line_summary": line_summary,
+    }
+
+
+def refresh_order_summaries(order_ids, item_model=OrderItem):
+    # Pass ArchivedOrderItem to refresh the matching archived orders
+    order_model = item_model._meta.get_field("order").related_model
+    lines = {order_id: [] for order_id in order_ids}
+    items = (
+        item_model.objects.filter(order_id__in=order_ids)
+        .order_by("order_id", "id")
+        .values_list("order_id", "menuitem__title", "quantity")
+    )
+    for order_id, title, quantity in items:
+        lines[order_id].append((title, quantity))
+    changed = []
+    with transaction.atomic():
+        orders = order_model.objects.filter(id__in=order_ids).only(
+            "id", *SUMMARY_FIELDS
+        )
+        for order in orders.select_for_update():
+            summary = build_summary(lines[order.id])
+            if any(getattr(order, field) != summary[field] for field in summary):
+                for field, value in summary.items():
+                    setattr(order, field, value)
+                changed.append(order)
+        order_model.objects.bulk_update(changed, SUMMARY_FIELDS)
+    return len(changed)
@@ -0,0 +1,133 @@
+import datetime
+import logging
+import threading
+import traceback
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .conf import get_config
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(name):
+    def decorator(func):
+        registry[name] = func
+        return func
+
+    return decorator
+
+
+def enqueue(name, **payload):
+    if name not in registry:
+        raise KeyError(f"Unknown task: {name}")
+    queued = Task.objects.create(name=name, payload=payload)
+    transaction.on_commit(wake_workers)
+    return queued
+
+
+def claim_tasks(limit):
+    now = timezone.now()
+    # Running tasks whose lease expired belong to a worker that died mid-task
+    due = Q(status=Task.PENDING) | Q(status=Task.RUNNING)
+    candidates = (
+        Task.objects.filter(due, run_at__lte=now)
+        .order_by("run_at")
+        .values_list("id", "status")[:limit]
+    )
+    lease_until = now + datetime.timedelta(seconds=get_config("TASK_QUEUE", "LEASE"))
+    claimed = []
+    for task_id, task_status in candidates:
+        updated = Task.objects.filter(
+            pk=task_id, status=task_status, run_at__lte=now
+        ).update(status=Task.RUNNING, run_at=lease_until, attempts=F("attempts") + 1)
+        if updated:
+            claimed.append(task_id)
+    return list(Task.objects.filter(pk__in=claimed).order_by("id"))
+
+
+def run_task(queued):
+    handler = registry.get(queued.name)
+    try:
+        if handler is None:
+            raise KeyError(f"Unknown task: {queued.name}")
+        handler(**queued.payload)
+    except Exception:
+        queued.last_error = traceback.format_exc()
+        if queued.attempts >= get_config("TASK_QUEUE", "MAX_ATTEMPTS"):
+            queued.status = Task.FAILED
+            logger.error("Task %s (%s) failed", queued.id, queued.name)
+        else:
+            queued.status = Task.PENDING
+            delay = get_config("TASK_QUEUE", "BACKOFF") * 2 ** (queued.attempts - 1)
+            queued.run_at = timezone.now() + datetime.timedelta(seconds=delay)
+        queued.save(update_fields=["status", "run_at", "last_error"])
+        return False
+    queued.status = Task.DONE
+    queued.save(update_fields=["status"])
+    return True
+
+
+def run_pending(limit=None):
+    claimed = claim_tasks(limit or get_config("TASK_QUEUE", "BATCH_SIZE"))
+    for queued in claimed:
+        run_task(queued)
+    return len(claimed)
+
+
+class WorkerPool:
+    def __init__(self, workers, poll_interval):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.threads = []
+
+    def start(self):
+        for number in range(self.workers):
+            thread = threading.Thread(
+                target=self.work, name=f"task-worker-{number}", daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+
+    def join(self):
+        for thread in self.threads:
+            thread.join()
+
+    def work(self):
+        while not self.stopping.is_set():
+            close_old_connections()
+            try:
+                processed = run_pending()
+            except Exception:
+                logger.exception("Task worker crashed while polling")
+                processed = 0
+            if not processed:
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+        close_old_connections()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def wake_workers():
+    global _pool
+    if _pool is None:
+        workers = get_config("TASK_QUEUE", "WORKERS")
+        if not workers:
+            return
+        with _pool_lock:
+            if _pool is None:
+                _pool = WorkerPool(workers, get_config("TASK_QUEUE", "POLL_INTERVAL"))
+                _pool.start()
+    _pool.wakeup.set()
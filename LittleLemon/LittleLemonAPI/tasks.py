@@ -0,0 +1,15 @@
+import logging
+from .models import Order
+from .taskqueue import task
+
+logger = logging.getLogger(__name__)
+
+
+@task("order_placed")
+def order_placed(order_id):
+    order = Order.objects.filter(pk=order_id).only("id", "user_id", "total").first()
+    if order is None:
+        return
+    logger.info(
+        "Order %s placed by user %s for %s", order.id, order.user_id, order.total
+    )
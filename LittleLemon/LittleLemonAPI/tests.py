@@ -1,3 +1,592 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import os
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth.models import User, Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from . import catalog, taskqueue
+from .middleware import ProfilingMiddleware
+from .pricing import update_menu_item_prices
+from .response_cache import catalog_cache
+from .models import (
+    Category,
+    MenuItem,
+    Cart,
+    Order,
+    ArchivedOrder,
+    ArchivedOrderItem,
+    CatalogVersion,
+    IdempotencyRecord,
+    OrderEvent,
+    Task,
+)
 
-# Create your tests here.
+
+class LittleLemonTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Versions restart with each test's rolled back database
+        catalog._snapshot = None
+        catalog.invalidate_snapshot()
+        manager_group = Group.objects.create(name="Manager")
+        delivery_group = Group.objects.create(name="Delivery_crew")
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.manager = User.objects.create_user("manager")
+        self.manager.groups.add(manager_group)
+        self.delivery = User.objects.create_user("delivery")
+        self.delivery.groups.add(delivery_group)
+        self.other_delivery = User.objects.create_user("other_delivery")
+        self.other_delivery.groups.add(delivery_group)
+        self.customer = User.objects.create_user("customer")
+        self.category = Category.objects.create(slug="mains", title="Mains")
+        self.pasta = MenuItem.objects.create(
+            title="Pasta", price=Decimal("5.00"), featured=True, category=self.category
+        )
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+
+class CartRepricingTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.soup = MenuItem.objects.create(
+            title="Soup", price=Decimal("3.00"), featured=False, category=self.category
+        )
+        for menuitem in [self.pasta, self.soup]:
+            Cart.objects.create(
+                user=self.customer,
+                menuitem=menuitem,
+                quantity=2,
+                unit_price=menuitem.price,
+                price=2 * menuitem.price,
+            )
+
+    def get_cart(self, menuitem):
+        return Cart.objects.get(user=self.customer, menuitem=menuitem)
+
+    def test_menu_item_update_reprices_carts(self):
+        response = self.client_for(self.manager).patch(
+            f"/api/menu-items/{self.pasta.id}", {"price": "7.00"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        cart = self.get_cart(self.pasta)
+        self.assertEqual(cart.unit_price, Decimal("7.00"))
+        self.assertEqual(cart.price, Decimal("14.00"))
+
+    def test_bulk_price_update_reprices_carts(self):
+        response = self.client_for(self.manager).patch(
+            "/api/menu-items/prices",
+            [
+                {"id": self.pasta.id, "price": "6.00"},
+                {"id": self.soup.id, "price": "4.00"},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.json(), {"updated": 2, "carts_repriced": 2})
+        self.assertEqual(self.get_cart(self.pasta).price, Decimal("12.00"))
+        self.assertEqual(self.get_cart(self.soup).price, Decimal("8.00"))
+
+    def test_missing_menu_item_rolls_back_the_batch(self):
+        response = self.client_for(self.manager).patch(
+            "/api/menu-items/prices",
+            [{"id": self.pasta.id, "price": "6.00"}, {"id": 999, "price": "1.00"}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["menuitem_ids"], ["999"])
+        self.pasta.refresh_from_db()
+        self.assertEqual(self.pasta.price, Decimal("5.00"))
+        self.assertEqual(self.get_cart(self.pasta).price, Decimal("10.00"))
+
+    def test_unchanged_price_skips_the_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(self.manager).patch(
+                "/api/menu-items/prices",
+                [{"id": self.pasta.id, "price": "5.00"}],
+                format="json",
+            )
+        self.assertEqual(response.json(), {"updated": 0, "carts_repriced": 0})
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("UPDATE")
+        ]
+        self.assertEqual(updates, [])
+
+    def test_cart_uses_price_changed_by_another_worker(self):
+        catalog.get_snapshot()
+        # Another worker commits a price change; this worker's snapshot is
+        # still within its check interval
+        MenuItem.objects.filter(pk=self.pasta.pk).update(price=Decimal("8.00"))
+        CatalogVersion.objects.update_or_create(pk=1, defaults={"version": 99})
+        self.assertEqual(
+            catalog.get_snapshot().items_by_id[self.pasta.pk].price, Decimal("5.00")
+        )
+        Cart.objects.all().delete()
+        self.client_for(self.customer).post(
+            "/api/cart/menu-items", {"menuitem_id": self.pasta.id, "quantity": 2}
+        )
+        cart = self.get_cart(self.pasta)
+        self.assertEqual(cart.unit_price, Decimal("8.00"))
+        self.assertEqual(cart.price, Decimal("16.00"))
+
+
+@override_settings(TASK_QUEUE={"WORKERS": 0})
+class IdempotencyTests(LittleLemonTestCase):
+    def test_retry_replays_stored_order(self):
+        client = self.client_for(self.customer)
+        client.post(
+            "/api/cart/menu-items", {"menuitem_id": self.pasta.id, "quantity": 2}
+        )
+        first = client.post("/api/orders", HTTP_IDEMPOTENCY_KEY="order-1")
+        retry = client.post("/api/orders", HTTP_IDEMPOTENCY_KEY="order-1")
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_for_different_request_is_rejected(self):
+        client = self.client_for(self.customer)
+        data = {"menuitem_id": self.pasta.id, "quantity": 2}
+        client.post("/api/cart/menu-items", data, HTTP_IDEMPOTENCY_KEY="cart-1")
+        data["quantity"] = 3
+        response = client.post(
+            "/api/cart/menu-items", data, HTTP_IDEMPOTENCY_KEY="cart-1"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Cart.objects.get().quantity, 2)
+
+    @override_settings(IDEMPOTENCY={"WAIT_TIMEOUT": 0.2, "POLL_INTERVAL": 0.05})
+    def test_request_in_progress_elsewhere_conflicts(self):
+        client = self.client_for(self.customer)
+        client.post(
+            "/api/cart/menu-items", {"menuitem_id": self.pasta.id, "quantity": 1}
+        )
+        client.post("/api/orders", HTTP_IDEMPOTENCY_KEY="order-2")
+        IdempotencyRecord.objects.update(status_code=None, body="")
+        response = client.post("/api/orders", HTTP_IDEMPOTENCY_KEY="order-2")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+@override_settings(
+    TASK_QUEUE={"WORKERS": 0, "MAX_ATTEMPTS": 3, "BACKOFF": 10, "LEASE": 300}
+)
+class TaskQueueTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        taskqueue.registry["test_ok"] = lambda **payload: self.calls.append(payload)
+        taskqueue.registry["test_fail"] = self.fail_task
+        self.addCleanup(taskqueue.registry.pop, "test_ok")
+        self.addCleanup(taskqueue.registry.pop, "test_fail")
+
+    def fail_task(self, **payload):
+        raise RuntimeError("supplier is down")
+
+    def make_due(self, queued):
+        Task.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+
+    def test_failures_back_off_exponentially_then_fail(self):
+        queued = taskqueue.enqueue("test_fail")
+        delays = []
+        for _ in range(2):
+            self.make_due(queued)
+            before = timezone.now()
+            taskqueue.run_pending()
+            queued.refresh_from_db()
+            self.assertEqual(queued.status, Task.PENDING)
+            delays.append(round((queued.run_at - before).total_seconds()))
+        self.assertEqual(delays, [10, 20])
+        self.make_due(queued)
+        with self.assertLogs("LittleLemonAPI.taskqueue", "ERROR"):
+            taskqueue.run_pending()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.FAILED)
+        self.assertEqual(queued.attempts, 3)
+        self.assertIn("supplier is down", queued.last_error)
+        self.make_due(queued)
+        self.assertEqual(taskqueue.run_pending(), 0)
+
+    def test_running_task_is_reclaimed_after_its_lease_expires(self):
+        queued = taskqueue.enqueue("test_ok", order_id=1)
+        Task.objects.filter(pk=queued.pk).update(
+            status=Task.RUNNING,
+            attempts=1,
+            run_at=timezone.now() + datetime.timedelta(seconds=60),
+        )
+        self.assertEqual(taskqueue.run_pending(), 0)
+        Task.objects.filter(pk=queued.pk).update(
+            run_at=timezone.now() - datetime.timedelta(seconds=1)
+        )
+        self.assertEqual(taskqueue.run_pending(), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.DONE)
+        self.assertEqual(queued.attempts, 2)
+        self.assertEqual(self.calls, [{"order_id": 1}])
+
+    def test_checkout_enqueues_task_in_the_order_transaction(self):
+        client = self.client_for(self.customer)
+        client.post(
+            "/api/cart/menu-items", {"menuitem_id": self.pasta.id, "quantity": 1}
+        )
+        with mock.patch(
+            "LittleLemonAPI.views.publish_order_event", side_effect=RuntimeError
+        ):
+            response = client.post("/api/orders")
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Task.objects.exists())
+        order_id = client.post("/api/orders").json()["id"]
+        queued = Task.objects.get()
+        self.assertEqual(
+            (queued.name, queued.payload), ("order_placed", {"order_id": order_id})
+        )
+        taskqueue.run_pending()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.DONE)
+
+
+@override_settings(
+    TASK_QUEUE={"WORKERS": 0},
+    ORDER_EVENTS={"POLL_INTERVAL": 0.01, "MAX_DURATION": 60, "BATCH_SIZE": 100},
+)
+class OrderEventStreamTests(LittleLemonTestCase):
+    def test_wsgi_stream_sends_events_without_waiting_for_the_end(self):
+        client = self.client_for(self.customer)
+        client.post(
+            "/api/cart/menu-items", {"menuitem_id": self.pasta.id, "quantity": 1}
+        )
+        order_id = client.post("/api/orders").json()["id"]
+        token = Token.objects.create(user=self.customer)
+        response = Client().get(
+            "/api/orders/events",
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+            HTTP_LAST_EVENT_ID="0",
+        )
+        self.assertFalse(response.is_async)
+        chunks = iter(response.streaming_content)
+        start = time.monotonic()
+        self.assertEqual(next(chunks), b"retry: 3000\n\n")
+        event = next(chunks).decode()
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertIn("event: created", event)
+        self.assertIn(f'"id":{order_id}', event)
+        self.assertIn('"status":false', event)
+        response.close()
+
+
+class OrderEventPruneTests(LittleLemonTestCase):
+    def test_prune_deletes_events_past_retention(self):
+        events = [
+            OrderEvent.objects.create(order_id=1, user_id=self.customer.id, kind=kind)
+            for kind in ["created", "updated", "updated"]
+        ]
+        OrderEvent.objects.filter(pk__in=[events[0].pk, events[1].pk]).update(
+            created=timezone.now() - datetime.timedelta(days=8)
+        )
+        out = io.StringIO()
+        call_command("prune_order_events", "--batch-size", "1", stdout=out)
+        self.assertIn("Pruned 2", out.getvalue())
+        self.assertEqual(list(OrderEvent.objects.all()), [events[2]])
+
+
+class CatalogImportTests(LittleLemonTestCase):
+    def post_catalog(self, content, **params):
+        if isinstance(content, str):
+            content = content.encode()
+        upload = SimpleUploadedFile("catalog.txt", content)
+        query = "&".join(f"{key}={value}" for key, value in params.items())
+        return self.client_for(self.admin).post(
+            f"/api/menu-items/import?{query}", {"file": upload}, format="multipart"
+        )
+
+    def test_file_format_param_and_blank_featured(self):
+        response = self.post_catalog(
+            "category_slug,category_title,title,price,featured\n"
+            "mains,Mains,Pasta,5.00,\n"
+            "mains,Mains,Soup,3.00,\n",
+            file_format="csv",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["rejected"], 0)
+        self.assertFalse(MenuItem.objects.get(title="Soup").featured)
+
+    def test_item_added_by_an_earlier_chunk_is_counted_once(self):
+        response = self.post_catalog(
+            "category_slug,category_title,title,price,featured\n"
+            "mains,Mains,Soup,3.00,false\n"
+            "mains,Mains,Soup,4.00,false\n",
+            file_format="csv",
+            chunk_size=1,
+        )
+        report = response.json()["menu_items"]
+        self.assertEqual(
+            report, {"added": 1, "changed": 0, "unchanged": 0, "removed": 1}
+        )
+        self.assertEqual(MenuItem.objects.get(title="Soup").price, Decimal("4.00"))
+
+    def test_bom_header_and_undecodable_line(self):
+        response = self.post_catalog(
+            b"\xef\xbb\xbfcategory_slug,category_title,title,price,featured\n"
+            b"mains,Mains,Soup,3.00,false\n"
+            b"mains,Mains,\xff\xfe,2.00,false\n"
+            b"mains,Mains,Salad,4.00,false\n",
+            file_format="csv",
+        )
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body["menu_items"]["added"], 2)
+        self.assertEqual(body["rejected"], 1)
+        self.assertEqual(body["errors"][0]["row"], 2)
+
+    def test_undecodable_header_is_rejected(self):
+        response = self.post_catalog(b"\xff\xfec\x00a\x00\n", file_format="csv")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(MenuItem.objects.exclude(pk=self.pasta.pk).exists())
+
+
+class ArchivedOrderListTests(LittleLemonTestCase):
+    def test_ordering_spans_hot_and_archived_orders(self):
+        today = datetime.date.today()
+        for total in ["4.00", "1.00"]:
+            Order.objects.create(user=self.customer, total=Decimal(total), date=today)
+        for order_id, total in [(900, "3.00"), (901, "2.00")]:
+            ArchivedOrder.objects.create(
+                id=order_id, user=self.customer, total=Decimal(total), date=today
+            )
+        response = self.client_for(self.manager).get(
+            "/api/orders?include_archived=true&ordering=-total"
+        )
+        totals = [order["total"] for order in response.json()["results"]]
+        self.assertEqual(totals, ["4.00", "3.00", "2.00", "1.00"])
+
+
+class ProfilingMiddlewareTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        profiling = {"ENABLED": True, "DIRECTORY": self.directory}
+        override = override_settings(PROFILING=profiling)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def get_categories(self, user):
+        token = Token.objects.create(user=user)
+        return Client().get(
+            "/api/categories",
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+            HTTP_X_PROFILE_REQUEST="1",
+        )
+
+    def test_superuser_request_is_profiled(self):
+        response = self.get_categories(self.admin)
+        profile_id = response["X-Profile-Id"]
+        self.assertTrue((self.directory / f"{profile_id}.prof").exists())
+        with open(self.directory / f"{profile_id}.sql.json") as sql_file:
+            report = json.load(sql_file)
+        self.assertEqual(report["path"], "/api/categories")
+        self.assertEqual(report["query_count"], len(report["queries"]))
+
+    def test_other_users_are_not_profiled(self):
+        response = self.get_categories(self.manager)
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_rotate_keeps_directory_under_max_bytes(self):
+        middleware = ProfilingMiddleware(lambda request: None)
+        middleware.max_bytes = 1000
+        for number in range(5):
+            path = self.directory / f"{number}.prof"
+            path.write_bytes(b"x" * 400)
+            os.utime(path, (number, number))
+        middleware.rotate()
+        self.assertEqual(
+            sorted(path.name for path in self.directory.iterdir()),
+            ["3.prof", "4.prof"],
+        )
+
+
+class CatalogSnapshotTests(LittleLemonTestCase):
+    def test_menu_item_save_bumps_version_and_reloads_snapshot(self):
+        before = catalog.get_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.admin).post(
+                "/api/menu-items",
+                {"title": "Soup", "price": "3.00", "category_id": self.category.id},
+            )
+        self.assertEqual(response.status_code, 201)
+        after = catalog.get_snapshot()
+        self.assertEqual(after.version, catalog.get_version())
+        self.assertGreater(after.version, before.version)
+        self.assertIn(response.json()["id"], after.items_by_id)
+
+    def test_bulk_price_update_bumps_version(self):
+        version = catalog.get_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            update_menu_item_prices({self.pasta.id: Decimal("6.00")})
+        self.assertEqual(catalog.get_version(), version + 1)
+        self.assertEqual(
+            catalog.get_snapshot().items_by_id[self.pasta.id].price, Decimal("6.00")
+        )
+
+    @override_settings(CATALOG_SNAPSHOT={"CHECK_INTERVAL": 0})
+    def test_version_bumped_by_another_worker_reloads_snapshot(self):
+        catalog.get_snapshot()
+        MenuItem.objects.filter(pk=self.pasta.pk).update(title="Linguine")
+        CatalogVersion.objects.update_or_create(pk=1, defaults={"version": 99})
+        snapshot = catalog.get_snapshot()
+        self.assertEqual(snapshot.version, 99)
+        self.assertEqual(snapshot.items_by_id[self.pasta.pk].title, "Linguine")
+
+
+class FilterEngineTests(LittleLemonTestCase):
+    def assertRejected(self, user, url, key):
+        response = self.client_for(user).get(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(key, response.json()["errors"])
+
+    def test_invalid_date_is_rejected(self):
+        self.assertRejected(self.manager, "/api/orders?date=yesterday", "date")
+
+    def test_out_of_range_integers_are_rejected(self):
+        huge = "99999999999999999999999"
+        self.assertRejected(
+            self.customer, f"/api/cart/menu-items?menuitem={huge}", "menuitem"
+        )
+        self.assertRejected(
+            self.customer,
+            f"/api/cart/menu-items?menuitem__in=1,{huge}",
+            "menuitem__in",
+        )
+        self.assertRejected(self.manager, f"/api/orders?user={huge}", "user")
+
+
+class UserGroupListTests(LittleLemonTestCase):
+    def test_delivery_crew_list_supports_ordering(self):
+        response = self.client_for(self.manager).get(
+            "/api/groups/delivery-crew/users?ordering=-username"
+        )
+        usernames = [user["username"] for user in response.json()["results"]]
+        self.assertEqual(usernames, ["other_delivery", "delivery"])
+
+    def test_djoser_user_list_supports_ordering(self):
+        response = self.client_for(self.admin).get("/auth/users/?ordering=username")
+        usernames = [user["username"] for user in response.json()["results"]]
+        self.assertEqual(usernames, sorted(usernames))
+        self.assertEqual(usernames[0], "admin")
+
+
+class OrderBulkUpdateTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        today = datetime.date.today()
+        self.own = Order.objects.create(
+            user=self.customer, delivery_crew=self.delivery, total=1, date=today
+        )
+        self.other = Order.objects.create(
+            user=self.customer, delivery_crew=self.other_delivery, total=2, date=today
+        )
+
+    def test_unknown_filter_key_is_rejected(self):
+        response = self.client_for(self.manager).patch(
+            "/api/orders", {"filter": {"stauts": False}, "status": True}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("stauts", response.json()["errors"])
+        self.assertFalse(Order.objects.filter(status=True).exists())
+
+    def test_all_orders_need_an_explicit_flag(self):
+        client = self.client_for(self.manager)
+        response = client.patch(
+            "/api/orders", {"filter": {}, "status": True}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        response = client.patch(
+            "/api/orders", {"all": True, "status": True}, format="json"
+        )
+        self.assertEqual(response.json()["updated"], 2)
+
+    def test_delivery_crew_only_updates_assigned_orders(self):
+        response = self.client_for(self.delivery).patch(
+            "/api/orders", {"filter": {"status": False}, "status": True}, format="json"
+        )
+        self.assertEqual(response.json()["updated"], 1)
+        self.own.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertTrue(self.own.status)
+        self.assertFalse(self.other.status)
+
+    def test_ids_outside_scope_are_rejected(self):
+        response = self.client_for(self.delivery).patch(
+            "/api/orders",
+            {"ids": [self.own.id, self.other.id, 999], "status": True},
+            format="json",
+        )
+        body = response.json()
+        self.assertEqual(body["updated"], 1)
+        self.assertEqual(
+            [rejected["id"] for rejected in body["rejected"]], [self.other.id, 999]
+        )
+        self.other.refresh_from_db()
+        self.assertFalse(self.other.status)
+
+    def test_out_of_range_ids_are_rejected(self):
+        huge = 99999999999999999999999
+        client = self.client_for(self.manager)
+        for data in [
+            {"ids": [huge], "status": True},
+            {"ids": [self.own.id], "delivery_crew_id": huge},
+        ]:
+            response = client.patch("/api/orders", data, format="json")
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.filter(status=True).exists())
+
+
+class MenuItemCacheTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        catalog_cache.clear()
+
+    def test_equivalent_queries_share_a_cache_entry(self):
+        client = self.client_for(self.customer)
+        for query in [
+            "featured=true&price__gte=1",
+            "price__gte=1.00&featured=1&page_size=1&utm_source=mail",
+        ]:
+            response = client.get(f"/api/menu-items?{query}")
+            self.assertEqual(len(response.json()["results"]), 1)
+        self.assertEqual(len(catalog_cache._entries), 1)
+
+
+class OrderSummaryRepairTests(LittleLemonTestCase):
+    def test_repair_covers_archived_orders(self):
+        order = ArchivedOrder.objects.create(
+            id=900, user=self.customer, total=10, date=datetime.date.today()
+        )
+        ArchivedOrderItem.objects.create(
+            order=order, menuitem=self.pasta, quantity=2, unit_price=5
+        )
+        call_command("repair_order_summaries", stdout=io.StringIO())
+        order.refresh_from_db()
+        self.assertEqual(order.item_count, 2)
+        self.assertEqual(order.line_summary, "2x Pasta")
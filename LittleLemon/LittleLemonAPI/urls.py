@@ -4,9 +4,12 @@ from . import views
 urlpatterns = [
     path("categories", views.CategoriesView.as_view()),
     path("menu-items", views.MenuItemsView.as_view()),
+    path("menu-items/import", views.CatalogImportView.as_view()),
+    path("menu-items/prices", views.MenuItemPricesView.as_view()),
     path("menu-items/<int:pk>", views.MenuItemView.as_view()),
     path("cart/menu-items", views.CartView.as_view()),
     path("orders", views.OrdersView.as_view()),
+    path("orders/events", views.order_events),
     path("orders/<int:pk>", views.OrderView.as_view()),
     path("groups/manager/users", views.ManagersUserGroupView.as_view()),
     path("groups/manager/users/<int:pk>", views.ManagerUserGroupView.as_view()),
@@ -1,10 +1,17 @@
 import datetime
 from decimal import Decimal
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User, Group
 from django.shortcuts import get_object_or_404
 from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from rest_framework import generics
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
 from rest_framework import status
 from rest_framework.exceptions import (
     ValidationError,
@@ -12,9 +19,10 @@ from rest_framework.exceptions import (
     NotFound,
     APIException,
     MethodNotAllowed,
+    AuthenticationFailed,
 )
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
-from .models import Category, MenuItem, Cart, Order, OrderItem
+from .models import Category, MenuItem, Cart, Order, OrderItem, ArchivedOrder
 from .serializers import (
     CategorySerializer,
     MenuItemSerializer,
@@ -22,7 +30,27 @@ from .serializers import (
     CartSerializer,
     OrderSerializer,
     OrderItemSerializer,
+    MenuItemPriceSerializer,
+    OrderBulkUpdateSerializer,
+    OrderSummarySerializer,
 )
+from .idempotency import idempotent
+from .taskqueue import enqueue
+from .events import (
+    publish_order_event,
+    publish_order_events,
+    get_event_scope,
+    get_last_event_id,
+    stream_order_events,
+    iter_order_events,
+)
+from .catalog_import import FORMATS, get_format, import_catalog
+from .archive import ArchiveChain, include_archived
+from .catalog import get_snapshot
+from .filters import Filter, RANGE_LOOKUPS, get_filter_engine
+from .response_cache import catalog_cache, get_cache_key
+from .summaries import build_summary
+from .pricing import reprice_carts, update_menu_item_prices
 
 
 def check_if_admin(self, raise_exception=True):
@@ -63,31 +91,35 @@ def check_if_customer(self, raise_exception=True):
     return True
 
 
-def search_queryset(self, queryset):
-    def get_param(field):
-        nonlocal self
-        value = self.request.query_params.get(field, None)
-        return {"true": True, "false": False}.get(
-            value.lower() if value else value, value
+def check_delivery_crew_member(user_id):
+    delivery = get_object_or_404(User, pk=user_id)
+    if not delivery.groups.filter(name="Delivery_crew").exists():
+        raise ValidationError(
+            {"message": "Only a delivery crew member can be assigned"}
         )
-
-    search_dict = {
-        field: get_param(field)
-        for field in self.search_fields
-        if get_param(field) != None
-    }
-    return queryset.filter(**search_dict)
+    return delivery
 
 
-def order_queryset(self, queryset):
-    ordering = self.request.query_params.get("ordering", None)
-    if ordering in self.ordering_fields:
-        return queryset.order_by(ordering)
-    return queryset
+def get_request_filters(self):
+    if not hasattr(self, "_request_filters"):
+        engine = get_filter_engine(type(self))
+        self._request_filters = engine.parse(self.request.query_params)
+    return self._request_filters
 
 
 def prepare_queryset(self, queryset):
-    return order_queryset(self, search_queryset(self, queryset))
+    return get_request_filters(self).filter_queryset(queryset)
+
+
+def search_snapshot(self, snapshot):
+    filters = get_request_filters(self)
+    entries = snapshot.menu_items
+    category_id = filters.get("category_id")
+    if category_id is not None:
+        entries = snapshot.items_by_category.get(category_id, ())
+    elif filters.get("featured") is True:
+        entries = snapshot.featured_items
+    return filters.filter_entries(entries)
 
 
 class ManagersUserGroupView(generics.ListCreateAPIView):
@@ -196,8 +228,22 @@ class DeliveryUserGroupView(generics.DestroyAPIView):
 class CategoriesView(generics.ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    # filter_fields are applied by the typed engine, not DRF's backends
+    filter_backends = []
+    filter_fields = {
+        "slug": Filter(str),
+        "title": Filter(str, ["exact", "icontains"]),
+    }
+    ordering_fields = ["id", "title"]
+    ordering = ["id"]
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
 
+    def get_queryset(self):
+        if self.request.method == "GET":
+            filters = get_request_filters(self)
+            return filters.filter_entries(get_snapshot().categories)
+        return super().get_queryset()
+
     def get_permissions(self):
         if self.request.method in self.allowed_methods:
             if self.request.method != "GET":
@@ -208,15 +254,45 @@ class CategoriesView(generics.ListCreateAPIView):
 class MenuItemsView(generics.ListCreateAPIView):
     queryset = MenuItem.objects.all()
     serializer_class = MenuItemSerializer
+    filter_backends = []
+    filter_fields = {
+        "title": Filter(str, ["exact", "icontains"]),
+        "category": Filter(int, ["exact", "in"], field="category_id"),
+        "price": Filter(Decimal, RANGE_LOOKUPS),
+        "featured": Filter(bool),
+    }
     ordering_fields = ["title", "price", "category_id"]
     ordering = ["category_id"]
-    search_fields = ["title", "category"]
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
 
     def get_queryset(self):
+        if self.request.method == "GET":
+            snapshot = getattr(self, "snapshot", None) or get_snapshot()
+            return search_snapshot(self, snapshot)
         queryset = super().get_queryset()
         return prepare_queryset(self, queryset)
 
+    def list(self, request, *args, **kwargs):
+        self.snapshot = get_snapshot()
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return super().list(request, *args, **kwargs)
+        key = get_cache_key(
+            request.path,
+            get_request_filters(self),
+            request.query_params.get(self.paginator.page_query_param),
+        )
+        cached = catalog_cache.get(self.snapshot.version, key)
+        if cached is None:
+            data = super().list(request, *args, **kwargs).data
+            body = JSONRenderer().render(data)
+            cached = catalog_cache.set(self.snapshot.version, key, body)
+        encoding, body = cached.negotiate(request.headers.get("Accept-Encoding", ""))
+        response = HttpResponse(body, content_type="application/json")
+        if encoding != "identity":
+            response["Content-Encoding"] = encoding
+        patch_vary_headers(response, ["Accept", "Accept-Encoding"])
+        return response
+
     def get_permissions(self):
         if self.request.method in self.allowed_methods:
             if self.request.method != "GET":
@@ -235,15 +311,85 @@ class MenuItemView(generics.RetrieveUpdateDestroyAPIView):
                 check_if_manager(self)
         return super().get_permissions()
 
+    def get_object(self):
+        if self.request.method != "GET":
+            return super().get_object()
+        menuitem = get_snapshot().items_by_id.get(self.kwargs["pk"])
+        if menuitem is None:
+            raise NotFound()
+        self.check_object_permissions(self.request, menuitem)
+        return menuitem
+
+    def perform_update(self, serializer):
+        old_price = serializer.instance.price
+        with transaction.atomic():
+            menuitem = serializer.save()
+            if menuitem.price != old_price:
+                reprice_carts(menuitem.id, menuitem.price)
+
+
+class MenuItemPricesView(generics.GenericAPIView):
+    queryset = MenuItem.objects.all()
+    serializer_class = MenuItemPriceSerializer
+    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+
+    def get_permissions(self):
+        check_if_manager(self)
+        return super().get_permissions()
+
+    def patch(self, request, *args, **kwargs):
+        serializer = MenuItemPriceSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        prices = {item["id"]: item["price"] for item in serializer.validated_data}
+        if not prices:
+            raise ValidationError({"message": "No prices were provided"})
+        result = update_menu_item_prices(prices)
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class CatalogImportView(generics.GenericAPIView):
+    queryset = MenuItem.objects.all()
+    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+
+    def get_permissions(self):
+        check_if_admin(self)
+        return super().get_permissions()
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"message": "A catalog file wasn't provided"})
+        # ?format= is reserved by DRF for renderer selection
+        fmt = request.query_params.get("file_format") or get_format(upload.name)
+        if fmt not in FORMATS:
+            raise ValidationError({"message": f"Format must be one of {FORMATS}"})
+        try:
+            chunk_size = int(request.query_params.get("chunk_size", 1000))
+        except ValueError:
+            raise ValidationError({"message": "chunk_size must be an integer"})
+        if chunk_size < 1:
+            raise ValidationError({"message": "chunk_size must be positive"})
+        report = import_catalog(upload.file, fmt, chunk_size)
+        return Response(report, status=status.HTTP_200_OK)
+
 
 class CartView(generics.ListCreateAPIView, generics.DestroyAPIView):
     queryset = Cart.objects.all()
     serializer_class = CartSerializer
+    filter_backends = []
+    filter_fields = {
+        "menuitem": Filter(int, ["exact", "in"], field="menuitem_id"),
+        "quantity": Filter(int, RANGE_LOOKUPS),
+        "price": Filter(Decimal, RANGE_LOOKUPS),
+    }
     ordering_fields = ["quantity", "unit_price", "price"]
+    ordering = ["id"]
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = Cart.objects.filter(user=self.request.user.id).select_related(
+            "menuitem__category"
+        )
         return prepare_queryset(self, queryset)
 
     def get_permissions(self):
@@ -251,14 +397,10 @@ class CartView(generics.ListCreateAPIView, generics.DestroyAPIView):
         return super().get_permissions()
 
     def get(self, request, *args, **kwargs):
-        try:
-            items = Cart.objects.filter(user=request.user.id)
-            res = CartSerializer(items, many=True)
-            self.queryset = res.data
-            return super().get(request, *args, **kwargs)
-        except:
-            raise APIException({"message": "The cart wasn't retrieved"})
+        get_request_filters(self)
+        return super().get(request, *args, **kwargs)
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         try:
             new_data = request.data.copy()
@@ -282,39 +424,127 @@ class CartView(generics.ListCreateAPIView, generics.DestroyAPIView):
 class OrdersView(generics.ListCreateAPIView):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    filter_backends = []
+    filter_fields = {
+        "status": Filter(bool),
+        "date": Filter(datetime.date, RANGE_LOOKUPS),
+        "total": Filter(Decimal, RANGE_LOOKUPS),
+        "user": Filter(int, ["exact", "in"], field="user_id"),
+        "delivery_crew": Filter(
+            int, ["exact", "in", "isnull"], field="delivery_crew_id"
+        ),
+    }
     ordering_fields = ["user_id", "delivery_crew_id", "status", "date", "total"]
     ordering = ["-date", "status"]
-    search_fields = ["status", "date"]
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        return prepare_queryset(self, queryset)
+        queryset = prepare_queryset(self, super().get_queryset())
+        if include_archived(self.request):
+            archived = prepare_queryset(self, self.archived_queryset)
+            ordering = get_request_filters(self).ordering
+            return ArchiveChain(queryset, archived, ordering)
+        return queryset
 
     def get(self, request, *args, **kwargs):
+        get_request_filters(self)
         orders = Order.objects.all()
+        archived_orders = ArchivedOrder.objects.all()
         if check_if_manager(self, False):
             pass
         elif check_if_delivery(self, False):
             orders = Order.objects.filter(delivery_crew=request.user.id)
+            archived_orders = ArchivedOrder.objects.filter(
+                delivery_crew=request.user.id
+            )
         elif check_if_customer(self, False):
             orders = Order.objects.filter(user=request.user.id)
+            archived_orders = ArchivedOrder.objects.filter(user=request.user.id)
         else:
             raise PermissionDenied({"message": "You don't have access to this method"})
+        if request.query_params.get("view") == "summary":
+            fields = OrderSummarySerializer.Meta.fields
+            orders = orders.only(*fields)
+            archived_orders = archived_orders.only(*fields)
+            self.serializer_class = OrderSummarySerializer
         self.queryset = orders
+        self.archived_queryset = archived_orders
         return super().get(request, *args, **kwargs)
 
+    def patch(self, request, *args, **kwargs):
+        keys = ["ids", "filter", "all", "status", "delivery_crew_id"]
+        if check_if_manager(self, False):
+            for key in list(request.data.keys()):
+                if key not in keys:
+                    raise ValidationError(
+                        {"message": "Managers can only update status and delivery crew"}
+                    )
+            orders = Order.objects.all()
+        elif check_if_delivery(self, False):
+            for key in list(request.data.keys()):
+                if key not in keys[:4]:
+                    raise ValidationError(
+                        {"message": "Delivery crew can only update status"}
+                    )
+            orders = Order.objects.filter(delivery_crew=request.user.id)
+        else:
+            raise PermissionDenied(
+                {"message": "Only managers and delivery crew can access this method"}
+            )
+        serializer = OrderBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        changes = {
+            key: data[key] for key in ["status", "delivery_crew_id"] if key in data
+        }
+        if changes.get("delivery_crew_id") is not None:
+            check_delivery_crew_member(changes["delivery_crew_id"])
+        if "filter" in data:
+            params = {
+                key: (
+                    ",".join(map(str, value)) if isinstance(value, list) else str(value)
+                )
+                for key, value in data["filter"].items()
+            }
+            filters = get_filter_engine(type(self)).parse(params, strict=True)
+            if not filters.conditions:
+                raise ValidationError(
+                    {"message": "The filter doesn't select any orders, use all instead"}
+                )
+            orders = filters.filter_queryset(orders)
+        elif "ids" in data:
+            orders = orders.filter(id__in=data["ids"])
+        with transaction.atomic():
+            order_ids = list(
+                orders.select_for_update().order_by().values_list("id", flat=True)
+            )
+            updated = Order.objects.filter(id__in=order_ids).update(**changes)
+            publish_order_events(Order.objects.filter(id__in=order_ids), "updated")
+        rejected = []
+        if "ids" in data:
+            found = set(order_ids)
+            rejected = [
+                {"id": order_id, "message": "Order not found or not permitted"}
+                for order_id in dict.fromkeys(data["ids"])
+                if order_id not in found
+            ]
+        return Response(
+            {"updated": updated, "rejected": rejected}, status=status.HTTP_200_OK
+        )
+
+    @idempotent
     def post(self, request, *args, **kwargs):
         check_if_customer(self)
         cart_items = Cart.objects.filter(user=request.user.id)
-        if not cart_items.exists():
+        items = list(cart_items.select_related("menuitem").order_by("id"))
+        if not items:
             raise NotFound({"message": "The cart is empty"})
         order_items = []
         total = Decimal(0)
-        for item in cart_items:
+        for item in items:
             order_items.append(
                 {
-                    "menuitem_id": item.menuitem.id,
+                    "menuitem_id": item.menuitem_id,
                     "quantity": item.quantity,
                     "unit_price": item.unit_price,
                 }
@@ -328,10 +558,13 @@ class OrdersView(generics.ListCreateAPIView):
         }
         serializer = OrderSerializer(data=order)
         serializer.is_valid(raise_exception=True)
+        summary = build_summary((item.menuitem.title, item.quantity) for item in items)
         try:
             with transaction.atomic():
-                serializer.save()
+                order = serializer.save(**summary)
                 cart_items.delete()
+                enqueue("order_placed", order_id=order.id)
+                publish_order_event(order, "created")
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
         except:
             raise APIException(
@@ -347,15 +580,16 @@ class OrderView(generics.RetrieveUpdateDestroyAPIView):
     def get(self, request, *args, **kwargs):
         check_if_customer(self)
         try:
-            order = get_object_or_404(Order, pk=kwargs.get("pk"))
-            if order.user.id != request.user.id:
+            order = Order.objects.filter(pk=kwargs.get("pk")).first()
+            if order is None and include_archived(request):
+                order = ArchivedOrder.objects.filter(pk=kwargs.get("pk")).first()
+            if order is None:
+                raise Order.DoesNotExist()
+            if order.user_id != request.user.id:
                 raise PermissionDenied(
                     {"message": "You don't have authorization to view this order"}
                 )
-            serializer = OrderItemSerializer(
-                data=OrderItem.objects.filter(order=order), many=True
-            )
-            serializer.is_valid()
+            serializer = OrderItemSerializer(order.orderitem_set.all(), many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Order.DoesNotExist:
             raise NotFound()
@@ -371,11 +605,7 @@ class OrderView(generics.RetrieveUpdateDestroyAPIView):
                         {"message": "Managers can only update status and delivery crew"}
                     )
             if request.data.get("delivery_crew_id"):
-                delivery = get_object_or_404(User, pk=request.data["delivery_crew_id"])
-                if not delivery.groups.filter(name="Delivery_crew").exists():
-                    raise ValidationError(
-                        {"message": "Only a delivery crew member can be assigned"}
-                    )
+                check_delivery_crew_member(request.data["delivery_crew_id"])
         elif check_if_delivery(self, False):
             for key in list(request.data.keys()):
                 if key != "status":
@@ -392,8 +622,61 @@ class OrderView(generics.RetrieveUpdateDestroyAPIView):
             )
         return super().partial_update(request, *args, **kwargs)
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            order = serializer.save()
+            publish_order_event(order, "updated")
+
     def destroy(self, request, *args, **kwargs):
         groups = self.request.user.groups
         if not groups.filter(name="Manager").exists():
             raise PermissionDenied({"message": "Only managers can access this method"})
         return super().destroy(request, *args, **kwargs)
+
+
+def get_stream_scope(request):
+    drf_request = Request(
+        request, authenticators=[TokenAuthentication(), SessionAuthentication()]
+    )
+    user = drf_request.user
+    if not user.is_authenticated:
+        return None, None
+    return user, get_event_scope(user)
+
+
+async def order_events(request):
+    if request.method != "GET":
+        return JsonResponse(
+            {"detail": f'Method "{request.method}" not allowed.'}, status=405
+        )
+    try:
+        user, scope = await sync_to_async(get_stream_scope)(request)
+    except AuthenticationFailed as e:
+        return JsonResponse({"detail": e.detail}, status=401)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=401
+        )
+    if scope is None:
+        return JsonResponse(
+            {"message": "You don't have access to this method"}, status=403
+        )
+    last_event_id = request.headers.get(
+        "Last-Event-ID", request.GET.get("last_event_id")
+    )
+    if last_event_id is None:
+        last_event_id = await sync_to_async(get_last_event_id)()
+    else:
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            return JsonResponse({"message": "Invalid Last-Event-ID"}, status=400)
+    if isinstance(request, ASGIRequest):
+        stream = stream_order_events(scope, last_event_id)
+    else:
+        # WSGI buffers async iterators, so stream from the worker thread instead
+        stream = iter_order_events(scope, last_event_id)
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response